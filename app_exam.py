@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
 import os
-from scraper.selenium_scraper import scraper_multi_pages
+import time
+from scraper.jobs import GestionnaireJobs, STATUTS_ACTIFS, EN_ATTENTE, EN_COURS, TERMINE, ANNULE, ECHEC, INTERROMPU
+from scraper.stockage import fichiers_nettoyes, lire_csv
 from dashboard.visualisations import afficher_dashboard
+from dashboard.recherche import charger_index
 from feedback.evaluation import formulaire
 
 # --- Configuration de la page ---
@@ -36,11 +39,16 @@ fichiers_brutes = {
     "Terrains à vendre": "Data/terrains____a__vendre.xlsx"
 }
 
-fichiers_nettoyes = {
-    "Appartements à louer": "Data/expat_dakar_apps_nettoyees.csv",
-    "Appartements meublés": "Data/expatDkr_app_meubles.csv",
-    "Terrains à vendre": "Data/expat_terrains_nettoyees.csv"
-}
+# --- Gestionnaire de jobs partagé par toutes les sessions du serveur ---
+# (son pool est arrêté si la ressource est libérée, par exemple via "Clear cache")
+@st.cache_resource(on_release=lambda gestionnaire: gestionnaire.fermer())
+def obtenir_gestionnaire_jobs():
+    return GestionnaireJobs()
+
+# --- Index de recherche, reconstruit seulement quand le fichier de données change ---
+@st.cache_resource(max_entries=len(fichiers_nettoyes))
+def obtenir_index(chemin, _df, version):
+    return charger_index(chemin, _df, version)
 
 # --- Scraping ---
 if menu == "Scraper les données (nettoyées)":
@@ -48,35 +56,73 @@ if menu == "Scraper les données (nettoyées)":
     categorie = st.selectbox("Choisissez une catégorie :", list(fichiers_nettoyes.keys()))
     nb_pages = st.slider("Nombre de pages à scraper :", 1, 100, 5)
 
+    gestionnaire = obtenir_gestionnaire_jobs()
+
     if st.button("Lancer le scraping"):
-        with st.spinner(f"Scraping de {categorie} sur {nb_pages} page(s)..."):
-            try:
-                # Lancement du scraping
-                df = scraper_multi_pages(nb_pages, categorie)
-
-                if df.empty:
-                    st.warning("⚠️ Aucune donnée récupérée. Vérifiez la connexion ou le site web.")
-                else:
-                    # Sauvegarde dans le bon fichier CSV
-                    nom_fichier = fichiers_nettoyes[categorie]
-                    df.to_csv(nom_fichier, index=False, encoding='utf-8')
-
-                    st.success(f"✅ {len(df)} annonces récupérées et enregistrées dans {nom_fichier}")
-
-                    # Affichage du DataFrame
-                    st.subheader("Aperçu des données scrapées")
-                    st.dataframe(df, use_container_width=True)
-
-                    # Bouton de téléchargement
-                    st.download_button(
-                        label=f"📥 Télécharger les données ({len(df)} lignes)",
-                        data=df.to_csv(index=False, encoding='utf-8'),
-                        file_name=nom_fichier.split("/")[-1],
-                        mime="text/csv"
-                    )
-            except Exception as e:
-                st.error(f"❌ Une erreur est survenue pendant le scraping : {str(e)}")
-                st.error("Vérifiez votre connexion internet et que les dépendances sont installées.")
+        try:
+            gestionnaire.soumettre(categorie, nb_pages)
+            st.success(f"✅ Scraping de {categorie} sur {nb_pages} page(s) lancé en arrière-plan.")
+        except ValueError as e:
+            st.warning(f"⚠️ {str(e)}")
+        except Exception as e:
+            st.error(f"❌ Impossible de lancer le scraping : {str(e)}")
+
+    # Suivi des jobs, rafraîchi automatiquement sans bloquer la page
+    @st.fragment(run_every=2)
+    def suivi_jobs():
+        st.subheader("Suivi des scrapings")
+        jobs = gestionnaire.lister()
+
+        # Un job vient de se terminer : on relance toute la page pour rafraîchir l'aperçu
+        actifs = {job["id"] for job in jobs if job["statut"] in STATUTS_ACTIFS}
+        termines = st.session_state.get("jobs_actifs", set()) - actifs
+        st.session_state["jobs_actifs"] = actifs
+        if termines:
+            st.rerun(scope="app")
+
+        if not jobs:
+            st.info("ℹ️ Aucun scraping lancé pour le moment.")
+            return
+
+        for job in jobs[:10]:
+            with st.container(border=True):
+                st.markdown(f"**{job['categorie']}** — {job['nb_pages']} page(s) — lancé le {job['cree_le']}")
+
+                if job["statut"] in (EN_ATTENTE, EN_COURS):
+                    libelle = "En attente d'un worker..." if job["statut"] == EN_ATTENTE else \
+                        f"Page {job['page']}/{job['nb_pages']} — {job['nb_annonces']} annonces"
+                    st.progress(job["page"] / job["nb_pages"], text=libelle)
+                    if st.button("⛔ Annuler", key=f"annuler_{job['id']}"):
+                        gestionnaire.annuler(job["id"])
+                        st.info("Annulation demandée, arrêt à la fin de la page en cours.")
+                elif job["statut"] == TERMINE:
+                    if job["nb_annonces"]:
+                        st.success(f"✅ {job['message']}")
+                    else:
+                        st.warning(f"⚠️ {job['message']}")
+                elif job["statut"] == ANNULE:
+                    st.warning(f"⛔ Scraping annulé ({job['nb_annonces']} annonces non enregistrées).")
+                elif job["statut"] == INTERROMPU:
+                    st.warning("⚠️ Scraping interrompu (processus arrêté ou serveur redémarré).")
+                elif job["statut"] == ECHEC:
+                    st.error(f"❌ Une erreur est survenue pendant le scraping : {job['erreur']}")
+
+    suivi_jobs()
+
+    # Aperçu des données de la catégorie sélectionnée
+    nom_fichier = fichiers_nettoyes[categorie]
+    if os.path.exists(nom_fichier):
+        df = pd.read_csv(nom_fichier, encoding='utf-8')
+        st.subheader("Aperçu des données scrapées")
+        st.dataframe(df, use_container_width=True)
+
+        # Bouton de téléchargement
+        st.download_button(
+            label=f"📥 Télécharger les données ({len(df)} lignes)",
+            data=df.to_csv(index=False, encoding='utf-8'),
+            file_name=os.path.basename(nom_fichier),
+            mime="text/csv"
+        )
 
 # --- Visualisation Dashboard ---
 elif menu == "Visualiser le dashboard":
@@ -84,11 +130,27 @@ elif menu == "Visualiser le dashboard":
     choix = st.selectbox("Choisissez une catégorie :", list(fichiers_nettoyes.keys()))
 
     try:
-        df = pd.read_csv(fichiers_nettoyes[choix], encoding='utf-8')
+        # Version lue sur le fichier même d'où vient df, pour que l'index lui corresponde
+        df, version = lire_csv(fichiers_nettoyes[choix])
         if df.empty:
             st.warning("⚠️ Le fichier de données est vide. Lancez d'abord le scraping.")
         else:
-            afficher_dashboard(df, choix)
+            requete = st.text_input("🔎 Rechercher dans les titres et localisations :",
+                                    placeholder="Ex. : piscine almadies")
+            if requete.strip():
+                index = obtenir_index(fichiers_nettoyes[choix], df, version)
+
+                debut = time.perf_counter()
+                positions = index.rechercher(requete)
+                duree_ms = (time.perf_counter() - debut) * 1000
+                st.caption(f"{len(positions)} annonce(s) trouvée(s) en {duree_ms:.1f} ms, triées par pertinence")
+
+                df = df.iloc[positions].reset_index(drop=True)
+
+            if df.empty:
+                st.warning("⚠️ Aucune annonce ne correspond à votre recherche.")
+            else:
+                afficher_dashboard(df, choix)
     except FileNotFoundError:
         st.error("❌ Fichier non trouvé. Veuillez lancer le scraping d'abord.")
     except Exception as e:
@@ -0,0 +1,195 @@
+import re
+import math
+import heapq
+import pickle
+import logging
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+
+from scraper.stockage import ecrire_fichier_atomique
+
+logger = logging.getLogger(__name__)
+
+# Colonnes indexées : noms des fichiers nettoyés puis noms produits par le scraper
+COLONNES_TITRE = ["Titre", "details"]
+COLONNES_LOCALISATION = ["Localisation", "adresse"]
+
+# Incrémenter si la structure de l'index change, pour invalider les fichiers persistés
+FORMAT_INDEX = 3
+
+# Paramètres BM25
+K1 = 1.2
+B = 0.75
+
+# Expansion des préfixes : en dessous de LONGUEUR_MIN_PREFIXE caractères un mot ne
+# correspond qu'à lui-même, au-delà il s'étend aux MAX_EXPANSIONS termes les plus fréquents
+LONGUEUR_MIN_PREFIXE = 2
+MAX_EXPANSIONS = 50
+
+# Ligatures que NFKD ne décompose pas (« Sacré-Cœur » -> « sacre-coeur »)
+LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "ß": "ss"})
+
+
+def normaliser(texte):
+    """
+    Met en minuscules, développe les ligatures et retire les accents
+    (« Piscine à Ngor » -> « piscine a ngor »)
+    """
+    decompose = unicodedata.normalize("NFKD", str(texte).lower().translate(LIGATURES))
+    return "".join(c for c in decompose if not unicodedata.combining(c))
+
+
+def tokeniser(texte):
+    return re.findall(r"[a-z0-9]+", normaliser(texte))
+
+
+def _premiere_colonne(df, candidates):
+    for col in candidates:
+        if col in df.columns:
+            return col
+    return None
+
+
+class IndexInverse:
+    """
+    Index inversé sur le titre et la localisation des annonces, avec
+    recherche par préfixe et classement BM25
+    """
+
+    def __init__(self, postings, longueurs):
+        self.postings = postings            # terme -> (positions triées des lignes, fréquences)
+        self.longueurs = longueurs          # nombre de termes par ligne
+        self.vocabulaire = sorted(postings)
+        self.nb_docs = len(longueurs)
+        longueurs = np.asarray(longueurs, dtype=np.float64)
+        longueur_moyenne = longueurs.mean() if self.nb_docs else 0
+        # Normalisation BM25 par ligne, précalculée une fois pour toutes les requêtes
+        self.normes = K1 * (1 - B + B * longueurs / longueur_moyenne) if longueur_moyenne else np.full(self.nb_docs, K1)
+
+    @classmethod
+    def construire(cls, df):
+        """
+        Construit l'index à partir d'un DataFrame (une entrée par ligne, dans l'ordre)
+        """
+        colonnes = [col for col in (_premiere_colonne(df, COLONNES_TITRE),
+                                    _premiere_colonne(df, COLONNES_LOCALISATION)) if col]
+        postings = {}
+        longueurs = []
+        textes = zip(*(df[col].fillna("").astype(str) for col in colonnes)) if colonnes else [()] * len(df)
+
+        for position, valeurs in enumerate(textes):
+            termes = tokeniser(" ".join(valeurs))
+            longueurs.append(len(termes))
+            for terme in termes:
+                docs = postings.setdefault(terme, {})
+                docs[position] = docs.get(position, 0) + 1
+
+        # Les positions sont insérées dans l'ordre croissant : les tableaux sont déjà triés
+        postings = {
+            terme: (np.fromiter(docs.keys(), dtype=np.int32, count=len(docs)),
+                    np.fromiter(docs.values(), dtype=np.float32, count=len(docs)))
+            for terme, docs in postings.items()
+        }
+        return cls(postings, longueurs)
+
+    def _termes_prefixe(self, prefixe):
+        if len(prefixe) < LONGUEUR_MIN_PREFIXE:
+            return [prefixe] if prefixe in self.postings else []
+
+        debut = bisect_left(self.vocabulaire, prefixe)
+        fin = bisect_left(self.vocabulaire, prefixe + "\uffff")
+        termes = self.vocabulaire[debut:fin]
+        if len(termes) <= MAX_EXPANSIONS:
+            return termes
+
+        # Préfixe trop large : le mot exact s'il existe, puis les termes les plus fréquents
+        exact = [prefixe] if prefixe in self.postings else []
+        autres = (terme for terme in termes if terme != prefixe)
+        return exact + heapq.nlargest(MAX_EXPANSIONS - len(exact), autres,
+                                      key=lambda terme: len(self.postings[terme][0]))
+
+    def rechercher(self, requete, limite=None):
+        """
+        Retourne (tableau numpy) les positions des lignes contenant tous les mots de
+        la requête (chacun pouvant être un préfixe), triées par pertinence décroissante
+        """
+        aucun = np.empty(0, dtype=np.int64)
+        mots = tokeniser(requete)
+        if not mots or not self.nb_docs:
+            return aucun
+
+        # Lignes candidates : intersection, mot par mot, de l'union des lignes de ses expansions
+        mots_termes = []
+        candidats = np.ones(self.nb_docs, dtype=bool)
+        for mot in dict.fromkeys(mots):
+            termes = self._termes_prefixe(mot)
+            present = np.zeros(self.nb_docs, dtype=bool)
+            for terme in termes:
+                present[self.postings[terme][0]] = True
+            candidats &= present
+            if not candidats.any():
+                return aucun
+            mots_termes.append((mot, termes, int(present.sum())))
+
+        # Score BM25 des seules lignes candidates
+        scores = np.zeros(self.nb_docs)
+        for mot, termes, nb_docs_mot in mots_termes:
+            # IDF du mot de la requête (toutes ses expansions confondues), pour qu'un terme
+            # plus long mais plus rare ne passe pas devant la correspondance exacte
+            idf = math.log(1 + (self.nb_docs - nb_docs_mot + 0.5) / (nb_docs_mot + 0.5))
+
+            meilleur = np.zeros(self.nb_docs)
+            for terme in termes:
+                positions, tf = self.postings[terme]
+                garde = candidats[positions]
+                positions, tf = positions[garde], tf[garde]
+                # Une correspondance exacte pèse plus qu'un simple préfixe
+                poids = idf * len(mot) / len(terme) * (K1 + 1)
+                meilleur[positions] = np.maximum(meilleur[positions], poids * tf / (tf + self.normes[positions]))
+            scores += meilleur
+
+        # Tri par score décroissant puis position croissante, en un seul tri d'entiers :
+        # les bits d'un float32 positif sont croissants avec sa valeur, on les inverse
+        # dans les 32 bits hauts et on place la position dans les 32 bits bas
+        resultats = np.flatnonzero(candidats)
+        bits = scores[resultats].astype(np.float32).view(np.uint32).astype(np.uint64)
+        cles = ((np.uint64(0xFFFFFFFF) - bits) << np.uint64(32)) | resultats.astype(np.uint64)
+        resultats = (np.sort(cles) & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        return resultats[:limite] if limite else resultats
+
+
+def chemin_index(chemin_donnees):
+    return f"{chemin_donnees}.index.pkl"
+
+
+def charger_index(chemin_donnees, df, version):
+    """
+    Charge l'index persisté à côté du fichier de données, ou le reconstruit
+    (et le persiste) si le fichier de données a changé depuis.
+    `version` doit être celle du fichier d'où df a été lu (voir stockage.lire_csv)
+    """
+    version = (FORMAT_INDEX,) + tuple(version)
+    chemin = chemin_index(chemin_donnees)
+
+    try:
+        with open(chemin, "rb") as f:
+            contenu = pickle.load(f)
+        if contenu["version"] == version:
+            return IndexInverse(contenu["postings"], contenu["longueurs"])
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError,
+            AttributeError, ValueError, ImportError):
+        # Index absent, illisible ou produit par une autre version : on le reconstruit
+        pass
+
+    index = IndexInverse.construire(df)
+    try:
+        ecrire_fichier_atomique(chemin, pickle.dumps({
+            "version": version,
+            "postings": index.postings,
+            "longueurs": index.longueurs
+        }, protocol=pickle.HIGHEST_PROTOCOL))
+    except OSError as e:
+        logger.warning("Impossible d'enregistrer l'index de recherche %s : %s", chemin, e)
+    return index
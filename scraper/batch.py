@@ -0,0 +1,124 @@
+"""
+Rafraîchissement headless de toutes les catégories, prévu pour un cron :
+
+    python -m scraper.batch --pages 5
+
+Les fichiers sont écrits dans le dossier Data/ du dépôt, quel que soit le
+répertoire courant. Les logs du scraping partent sur stderr ; stdout ne
+contient que le résumé JSON.
+Code de sortie : 0 si toutes les catégories ont été enregistrées, 1 sinon,
+2 si les arguments sont invalides.
+"""
+import sys
+import json
+import time
+import argparse
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from selenium.common.exceptions import WebDriverException
+
+from scraper.selenium_scraper import scraper_multi_pages, creer_driver
+from scraper.stockage import enregistrer_csv, fichiers_nettoyes
+
+
+def _erreur_session(driver):
+    """
+    Retourne None si la session Chrome répond encore, sinon le message d'erreur
+    (InvalidSessionIdException est une WebDriverException)
+    """
+    try:
+        driver.current_url
+        return None
+    except WebDriverException as e:
+        return f"Session Chrome perdue : {e.msg or type(e).__name__}"
+
+
+def _fermer_driver(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+
+
+def rafraichir_categories(nb_pages, categories=None):
+    """
+    Scrape, nettoie et enregistre chaque catégorie avec un seul navigateur partagé,
+    puis retourne le résumé de l'exécution
+    """
+    categories = categories or list(fichiers_nettoyes.keys())
+    resume = {
+        "debut": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "nb_pages": nb_pages,
+        "categories": [],
+        "succes": True
+    }
+
+    driver = None
+    try:
+        for categorie in categories:
+            debut = time.perf_counter()
+            resultat = {"categorie": categorie, "fichier": fichiers_nettoyes.get(categorie)}
+            try:
+                # Navigateur partagé, (re)créé au besoin après une session perdue
+                if driver is None:
+                    driver = creer_driver()
+
+                df = scraper_multi_pages(nb_pages, categorie, driver=driver)
+
+                # Si Chrome est mort en cours de route, chaque page a échoué et df est vide
+                # ou partiel : on le signale et la catégorie suivante repart d'un navigateur neuf
+                erreur = _erreur_session(driver)
+                if erreur:
+                    print(f"{erreur} pendant {categorie}, redémarrage du navigateur")
+                    _fermer_driver(driver)
+                    driver = None
+                    resultat.update(statut="echec", nb_annonces=0, erreur=erreur)
+                    resume["succes"] = False
+                elif df.empty:
+                    # On garde le fichier existant plutôt que de l'écraser par un fichier vide
+                    resultat.update(statut="vide", nb_annonces=0)
+                    resume["succes"] = False
+                else:
+                    enregistrer_csv(df, fichiers_nettoyes[categorie])
+                    resultat.update(statut="ok", nb_annonces=len(df))
+            except Exception as e:
+                print(f"Erreur pour {categorie} : {str(e)}")
+                resultat.update(statut="echec", nb_annonces=0, erreur=str(e))
+                resume["succes"] = False
+            resultat["duree_s"] = round(time.perf_counter() - debut, 2)
+            resume["categories"].append(resultat)
+    finally:
+        if driver:
+            _fermer_driver(driver)
+
+    resume["fin"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return resume
+
+
+def _entier_positif(valeur):
+    try:
+        nombre = int(valeur)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{valeur!r} n'est pas un entier")
+    if nombre < 1:
+        raise argparse.ArgumentTypeError(f"le nombre de pages doit être au moins 1 (reçu : {nombre})")
+    return nombre
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rafraîchit les données nettoyées de toutes les catégories.")
+    parser.add_argument("--pages", type=_entier_positif, default=5, help="Nombre de pages à scraper par catégorie")
+    parser.add_argument("--categorie", action="append", choices=list(fichiers_nettoyes.keys()),
+                        help="Catégorie à rafraîchir (répétable, toutes par défaut)")
+    args = parser.parse_args(argv)
+
+    with redirect_stdout(sys.stderr):
+        resume = rafraichir_categories(args.pages, args.categorie)
+
+    print(json.dumps(resume, ensure_ascii=False))
+    return 0 if resume["succes"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
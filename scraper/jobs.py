@@ -0,0 +1,334 @@
+import os
+import json
+import time
+import uuid
+import threading
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from scraper.selenium_scraper import scraper_multi_pages, ScrapingAnnule
+from scraper.stockage import ecrire_fichier_atomique, enregistrer_csv, fichiers_nettoyes, DOSSIER_DATA
+
+# --- Dossier de persistance de l'état des jobs ---
+DOSSIER_JOBS = os.path.join(DOSSIER_DATA, "jobs")
+
+# --- Statuts possibles d'un job ---
+EN_ATTENTE = "en_attente"
+EN_COURS = "en_cours"
+TERMINE = "termine"
+ANNULE = "annule"
+ECHEC = "echec"
+INTERROMPU = "interrompu"
+
+STATUTS_ACTIFS = (EN_ATTENTE, EN_COURS)
+
+# Nombre de jobs terminés conservés sur disque (les plus récents)
+NB_JOBS_CONSERVES = 20
+
+# Un worker vivant touche son fichier de battement toutes les INTERVALLE_BATTEMENT secondes ;
+# sans battement depuis DELAI_ORPHELIN secondes, le job est considéré comme orphelin
+INTERVALLE_BATTEMENT = 5
+DELAI_ORPHELIN = 30
+
+
+def _maintenant():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _chemin_job(job_id):
+    return os.path.join(DOSSIER_JOBS, f"{job_id}.json")
+
+
+def _chemin_annulation(job_id):
+    return os.path.join(DOSSIER_JOBS, f"{job_id}.annuler")
+
+
+def _chemin_battement(job_id):
+    return os.path.join(DOSSIER_JOBS, f"{job_id}.battement")
+
+
+def lire_job(job_id):
+    """
+    Lit l'état persisté d'un job (None si introuvable ou illisible)
+    """
+    try:
+        with open(_chemin_job(job_id), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _ecrire_job(job):
+    ecrire_fichier_atomique(_chemin_job(job["id"]), json.dumps(job, ensure_ascii=False, indent=2))
+
+
+def _mettre_a_jour_job(job_id, statuts=None, **champs):
+    """
+    Met à jour un job ; si `statuts` est fourni, seulement s'il est encore dans l'un d'eux
+    """
+    job = lire_job(job_id)
+    if job is None or (statuts is not None and job["statut"] not in statuts):
+        return None
+    job.update(champs)
+    _ecrire_job(job)
+    return job
+
+
+def lister_jobs():
+    """
+    Liste tous les jobs persistés, du plus récent au plus ancien
+    """
+    if not os.path.isdir(DOSSIER_JOBS):
+        return []
+
+    jobs = []
+    for nom in os.listdir(DOSSIER_JOBS):
+        if nom.endswith(".json"):
+            job = lire_job(nom[:-len(".json")])
+            if job:
+                jobs.append(job)
+    return sorted(jobs, key=lambda job: job["cree_le"], reverse=True)
+
+
+def purger_jobs(conserver=NB_JOBS_CONSERVES):
+    """
+    Supprime les jobs terminés les plus anciens pour n'en garder que `conserver`
+    """
+    termines = [job for job in lister_jobs() if job["statut"] not in STATUTS_ACTIFS]
+    for job in termines[conserver:]:
+        for chemin in (_chemin_job(job["id"]), _chemin_annulation(job["id"]), _chemin_battement(job["id"])):
+            if os.path.exists(chemin):
+                os.remove(chemin)
+
+
+def _age_battement(job_id):
+    try:
+        return time.time() - os.path.getmtime(_chemin_battement(job_id))
+    except FileNotFoundError:
+        return None
+
+
+def job_orphelin(job, suivis=()):
+    """
+    Indique si un job actif n'a plus de processus pour le faire avancer :
+    en cours sans battement récent, ou en attente depuis trop longtemps sans
+    être suivi par le gestionnaire courant (`suivis` : ids de ses futures)
+    """
+    if job["statut"] not in STATUTS_ACTIFS:
+        return False
+
+    age = _age_battement(job["id"])
+    if age is not None:
+        return age > DELAI_ORPHELIN
+    if job["statut"] == EN_COURS:
+        # Un worker crée son battement avant de passer en cours
+        return True
+    if job["id"] in suivis:
+        # En file dans le pool du gestionnaire courant
+        return False
+    cree_le = datetime.strptime(job["cree_le"], "%Y-%m-%d %H:%M:%S")
+    return (datetime.now() - cree_le).total_seconds() > DELAI_ORPHELIN
+
+
+def _toucher_battement(job_id):
+    chemin = _chemin_battement(job_id)
+    with open(chemin, "a", encoding="utf-8"):
+        pass
+    os.utime(chemin)
+
+
+def _battre(job_id, arret):
+    """
+    Touche le fichier de battement du job jusqu'à ce que `arret` soit positionné
+    """
+    while not arret.wait(INTERVALLE_BATTEMENT):
+        _toucher_battement(job_id)
+
+
+def annulation_demandee(job_id):
+    return os.path.exists(_chemin_annulation(job_id))
+
+
+def _executer_job(job_id, nb_pages, categorie, chemin_sortie):
+    """
+    Point d'entrée exécuté dans un processus du pool : scrape, enregistre
+    le résultat et tient à jour l'état du job sur disque
+    """
+    if annulation_demandee(job_id):
+        _mettre_a_jour_job(job_id, (EN_ATTENTE,), statut=ANNULE, fin=_maintenant())
+        os.remove(_chemin_annulation(job_id))
+        return
+
+    # Le job a pu être déclaré interrompu ou annulé pendant le démarrage du worker :
+    # on ne le relance pas, une autre exécution de la catégorie peut avoir pris le relais
+    _toucher_battement(job_id)
+    if _mettre_a_jour_job(job_id, (EN_ATTENTE,), statut=EN_COURS, debut=_maintenant(), pid=os.getpid()) is None:
+        os.remove(_chemin_battement(job_id))
+        return
+
+    arret = threading.Event()
+    battement = threading.Thread(target=_battre, args=(job_id, arret), daemon=True)
+    battement.start()
+
+    def progression(page, total, nb_annonces):
+        if annulation_demandee(job_id) or \
+                _mettre_a_jour_job(job_id, (EN_COURS,), page=page, nb_annonces=nb_annonces) is None:
+            raise ScrapingAnnule(job_id)
+
+    try:
+        df = scraper_multi_pages(nb_pages, categorie, callback_progression=progression)
+
+        if df.empty:
+            _mettre_a_jour_job(job_id, (EN_COURS,), statut=TERMINE, fin=_maintenant(), nb_annonces=0,
+                               message="Aucune donnée récupérée. Vérifiez la connexion ou le site web.")
+        elif (lire_job(job_id) or {}).get("statut") == EN_COURS:
+            enregistrer_csv(df, chemin_sortie)
+            _mettre_a_jour_job(job_id, (EN_COURS,), statut=TERMINE, fin=_maintenant(), nb_annonces=len(df),
+                               message=f"{len(df)} annonces enregistrées dans {chemin_sortie}")
+    except ScrapingAnnule:
+        _mettre_a_jour_job(job_id, (EN_COURS,), statut=ANNULE, fin=_maintenant())
+    except Exception as e:
+        _mettre_a_jour_job(job_id, (EN_COURS,), statut=ECHEC, fin=_maintenant(), erreur=str(e))
+    finally:
+        arret.set()
+        battement.join()
+        for chemin in (_chemin_annulation(job_id), _chemin_battement(job_id)):
+            if os.path.exists(chemin):
+                os.remove(chemin)
+
+
+class GestionnaireJobs:
+    """
+    Exécute les scrapings dans un pool de processus, un job actif au plus par catégorie
+    """
+
+    def __init__(self, max_workers=None):
+        os.makedirs(DOSSIER_JOBS, exist_ok=True)
+        self._max_workers = max_workers or len(fichiers_nettoyes)
+        self._futures = {}
+        self._verrou = threading.Lock()
+        self._ferme = False
+        self._pool = self._creer_pool()
+
+        self.lister()
+        purger_jobs()
+
+    def _creer_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def fermer(self):
+        """
+        Arrête le pool : les jobs en attente sont annulés, ceux en cours vont à leur terme
+        """
+        with self._verrou:
+            self._ferme = True
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def lister(self):
+        """
+        Liste les jobs comme lister_jobs, en marquant au passage les orphelins comme
+        interrompus (worker tué, serveur redémarré, cache Streamlit vidé...)
+        """
+        jobs = lister_jobs()
+        for job in jobs:
+            if job_orphelin(job, suivis=self._futures):
+                mis_a_jour = _mettre_a_jour_job(job["id"], STATUTS_ACTIFS, statut=INTERROMPU, fin=_maintenant())
+                job.update(mis_a_jour or lire_job(job["id"]) or {})
+        return jobs
+
+    def job_actif(self, categorie):
+        """
+        Retourne le job en attente ou en cours pour une catégorie, s'il existe
+        """
+        for job in self.lister():
+            if job["categorie"] == categorie and job["statut"] in STATUTS_ACTIFS:
+                return job
+        return None
+
+    def soumettre(self, categorie, nb_pages):
+        """
+        Soumet un scraping au pool et retourne l'identifiant du job
+        """
+        if categorie not in fichiers_nettoyes:
+            raise ValueError(f"Catégorie inconnue : {categorie}. Catégories disponibles : {list(fichiers_nettoyes.keys())}")
+        with self._verrou:
+            if self._ferme:
+                raise RuntimeError("Le gestionnaire de jobs est arrêté")
+            if self.job_actif(categorie):
+                raise ValueError(f"Un scraping est déjà en cours pour {categorie}")
+
+            job_id = uuid.uuid4().hex[:12]
+            _ecrire_job({
+                "id": job_id,
+                "categorie": categorie,
+                "nb_pages": nb_pages,
+                "fichier": fichiers_nettoyes[categorie],
+                "statut": EN_ATTENTE,
+                "page": 0,
+                "nb_annonces": 0,
+                "cree_le": _maintenant(),
+                "debut": None,
+                "fin": None,
+                "message": None,
+                "erreur": None
+            })
+
+            args = (_executer_job, job_id, nb_pages, categorie, fichiers_nettoyes[categorie])
+            try:
+                try:
+                    pool = self._pool
+                    future = pool.submit(*args)
+                except BrokenProcessPool:
+                    # Un worker est mort plus tôt : le pool est inutilisable, on le remplace
+                    pool = self._pool = self._creer_pool()
+                    future = pool.submit(*args)
+            except Exception as e:
+                _mettre_a_jour_job(job_id, (EN_ATTENTE,), statut=ECHEC, fin=_maintenant(), erreur=str(e))
+                raise
+
+            self._futures[job_id] = future
+            purger_jobs()
+
+        future.add_done_callback(lambda f: self._terminer(job_id, f, pool))
+        return job_id
+
+    def _terminer(self, job_id, future, pool):
+        self._futures.pop(job_id, None)
+        if future.cancelled():
+            _mettre_a_jour_job(job_id, (EN_ATTENTE,), statut=ANNULE, fin=_maintenant())
+            return
+
+        erreur = future.exception()
+        if erreur is None:
+            return
+
+        # Processus mort (crash de Chrome, OOM...) avant d'avoir pu écrire son état
+        _mettre_a_jour_job(job_id, STATUTS_ACTIFS, statut=ECHEC, fin=_maintenant(), erreur=str(erreur))
+
+        if isinstance(erreur, BrokenProcessPool):
+            with self._verrou:
+                # Tous les futures d'un pool cassé échouent : un seul remplacement suffit
+                if self._pool is pool and not self._ferme:
+                    self._pool = self._creer_pool()
+
+    def annuler(self, job_id):
+        """
+        Demande l'annulation d'un job ; un job en cours s'arrête à la fin de la page courante
+        """
+        # lister() marque d'abord les orphelins, qu'aucun worker ne viendrait annuler
+        job = next((job for job in self.lister() if job["id"] == job_id), None)
+        if job is None or job["statut"] not in STATUTS_ACTIFS:
+            return False
+
+        future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            return True
+
+        with open(_chemin_annulation(job_id), "w", encoding="utf-8") as f:
+            f.write(_maintenant())
+        return True
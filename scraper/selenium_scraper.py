@@ -9,20 +9,22 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 import time
 
-def scraper_multi_pages(nb_pages=5, categorie="Appartements à louer"):
-    """
-    Scrape multi-pages avec gestion d'erreurs améliorée
-    """
-    base_urls = {
-        "Appartements à louer": "https://www.expat-dakar.com/appartements-a-louer?page=",
-        "Appartements meublés": "https://www.expat-dakar.com/appartements-meubles?page=",
-        "Terrains à vendre": "https://www.expat-dakar.com/terrains-a-vendre?page="
-    }
 
-    url_base = base_urls.get(categorie)
-    if not url_base:
-        raise ValueError(f"Catégorie inconnue : {categorie}. Catégories disponibles : {list(base_urls.keys())}")
+base_urls = {
+    "Appartements à louer": "https://www.expat-dakar.com/appartements-a-louer?page=",
+    "Appartements meublés": "https://www.expat-dakar.com/appartements-meubles?page=",
+    "Terrains à vendre": "https://www.expat-dakar.com/terrains-a-vendre?page="
+}
+
+
+class ScrapingAnnule(Exception):
+    """Levée par un callback de progression pour interrompre le scraping"""
 
+
+def creer_driver():
+    """
+    Démarre un Chrome headless configuré pour le scraping
+    """
     # Configuration Chrome optimisée
     options = Options()
     options.add_argument("--headless=new")
@@ -35,17 +37,35 @@ def scraper_multi_pages(nb_pages=5, categorie="Appartements à louer"):
     options.add_experimental_option("excludeSwitches", ["enable-automation"])
     options.add_experimental_option('useAutomationExtension', False)
 
+    # Initialisation du driver avec gestion d'erreur
+    try:
+        service = Service(ChromeDriverManager().install())
+        driver = webdriver.Chrome(service=service, options=options)
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    except WebDriverException as e:
+        raise Exception(f"Impossible d'initialiser le navigateur Chrome : {str(e)}")
+
+    return driver
+
+
+def scraper_multi_pages(nb_pages=5, categorie="Appartements à louer", callback_progression=None, driver=None):
+    """
+    Scrape multi-pages avec gestion d'erreurs améliorée
+
+    callback_progression(page, nb_pages, nb_annonces) est appelé après chaque page ;
+    il peut lever ScrapingAnnule pour arrêter proprement le scraping.
+    Si un driver est fourni, il est réutilisé et laissé ouvert pour l'appelant.
+    """
+    url_base = base_urls.get(categorie)
+    if not url_base:
+        raise ValueError(f"Catégorie inconnue : {categorie}. Catégories disponibles : {list(base_urls.keys())}")
+
     # Liste pour stocker les données
     data = []
-    driver = None
+    driver_local = driver is None
     try:
-        # Initialisation du driver avec gestion d'erreur
-        try:
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=options)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        except WebDriverException as e:
-            raise Exception(f"Impossible d'initialiser le navigateur Chrome : {str(e)}")
+        if driver_local:
+            driver = creer_driver()
 
         print(f"Début du scraping pour {categorie} sur {nb_pages} pages...")
 
@@ -126,19 +146,35 @@ def scraper_multi_pages(nb_pages=5, categorie="Appartements à louer"):
 
             except TimeoutException:
                 print(f"Timeout sur la page {page} - passage à la suivante")
-                continue
             except Exception as e:
                 print(f"Erreur sur la page {page}: {str(e)}")
-                continue
+
+            # Progression (hors du try de la page pour laisser remonter ScrapingAnnule)
+            if callback_progression:
+                callback_progression(page, nb_pages, len(data))
+
+    except ScrapingAnnule:
+        print(f"Scraping de {categorie} annulé")
+        raise
 
     except Exception as e:
         print(f"Erreur générale durant le scraping : {str(e)}")
         raise
 
     finally:
-        if driver:
+        if driver_local and driver:
             driver.quit()
 
+    df = nettoyer_donnees(data)
+    if not df.empty:
+        print(f"Scraping terminé : {len(df)} annonces récupérées")
+    return df
+
+
+def nettoyer_donnees(data):
+    """
+    Construit le DataFrame nettoyé à partir des annonces brutes
+    """
     # Création du DataFrame
     df = pd.DataFrame(data)
     
@@ -147,7 +183,7 @@ def scraper_multi_pages(nb_pages=5, categorie="Appartements à louer"):
         return pd.DataFrame()
     
     # Nettoyage des données
-    df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+    df = df.map(lambda x: x.strip() if isinstance(x, str) else x)
     
     # Assurer que toutes les colonnes existent
     colonnes_requises = ["categorie", "details", "adresse", "chambres", "superficie", "prix", "image_lien"]
@@ -155,5 +191,4 @@ def scraper_multi_pages(nb_pages=5, categorie="Appartements à louer"):
         if col not in df.columns:
             df[col] = None
 
-    print(f"Scraping terminé : {len(df)} annonces récupérées")
     return df
\ No newline at end of file
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+import pandas as pd
+
+# --- Dossier des données, résolu depuis la racine du dépôt et non le répertoire courant ---
+# (le batch lancé par cron depuis un autre dossier écrit ainsi au bon endroit)
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOSSIER_DATA = os.path.join(RACINE, "Data")
+
+# --- Fichiers de données nettoyées (un par catégorie) ---
+fichiers_nettoyes = {
+    "Appartements à louer": os.path.join(DOSSIER_DATA, "expat_dakar_apps_nettoyees.csv"),
+    "Appartements meublés": os.path.join(DOSSIER_DATA, "expatDkr_app_meubles.csv"),
+    "Terrains à vendre": os.path.join(DOSSIER_DATA, "expat_terrains_nettoyees.csv")
+}
+
+
+def ecrire_fichier_atomique(chemin, contenu, encoding="utf-8"):
+    """
+    Écrit un fichier (texte ou bytes) via un fichier temporaire puis os.replace,
+    pour qu'un lecteur ne voie jamais un fichier à moitié écrit
+    """
+    dossier = os.path.dirname(chemin) or "."
+    os.makedirs(dossier, exist_ok=True)
+    fd, chemin_tmp = tempfile.mkstemp(dir=dossier, prefix=".tmp_", suffix=os.path.basename(chemin))
+    try:
+        if isinstance(contenu, bytes):
+            f = os.fdopen(fd, "wb")
+        else:
+            f = os.fdopen(fd, "w", encoding=encoding, newline="")
+        with f:
+            f.write(contenu)
+        os.replace(chemin_tmp, chemin)
+    except Exception:
+        if os.path.exists(chemin_tmp):
+            os.remove(chemin_tmp)
+        raise
+
+
+def enregistrer_csv(df, chemin):
+    """
+    Enregistre un DataFrame en CSV de manière atomique
+    """
+    ecrire_fichier_atomique(chemin, df.to_csv(index=False, encoding='utf-8'))
+
+
+def lire_csv(chemin):
+    """
+    Lit un CSV et retourne (df, version), la version (taille, mtime) étant prise
+    sur le fichier même qui a été lu, même s'il est remplacé entre-temps
+    """
+    with open(chemin, "rb") as f:
+        stat = os.fstat(f.fileno())
+        df = pd.read_csv(f, encoding='utf-8')
+    return df, (stat.st_size, stat.st_mtime_ns)
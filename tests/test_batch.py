@@ -0,0 +1,109 @@
+import json
+
+import pandas as pd
+import pytest
+from selenium.common.exceptions import InvalidSessionIdException
+
+from scraper import batch
+
+
+class FauxDriver:
+    def __init__(self):
+        self.mort = False
+        self.ferme = False
+
+    @property
+    def current_url(self):
+        if self.mort:
+            raise InvalidSessionIdException("invalid session id")
+        return "https://www.expat-dakar.com"
+
+    def quit(self):
+        self.ferme = True
+
+
+@pytest.fixture
+def fichiers(tmp_path, monkeypatch):
+    fichiers = {
+        "Appartements à louer": str(tmp_path / "louer.csv"),
+        "Appartements meublés": str(tmp_path / "meubles.csv"),
+        "Terrains à vendre": str(tmp_path / "terrains.csv")
+    }
+    monkeypatch.setattr(batch, "fichiers_nettoyes", fichiers)
+    return fichiers
+
+
+@pytest.fixture
+def drivers(monkeypatch):
+    crees = []
+
+    def creer_driver():
+        crees.append(FauxDriver())
+        return crees[-1]
+
+    monkeypatch.setattr(batch, "creer_driver", creer_driver)
+    return crees
+
+
+def annonces(n):
+    return pd.DataFrame({"details": [f"Annonce {i}" for i in range(n)]})
+
+
+def test_statuts_ok_vide_et_echec(fichiers, drivers, monkeypatch):
+    def scraper(nb_pages, categorie, driver=None):
+        if categorie == "Appartements meublés":
+            return pd.DataFrame()
+        if categorie == "Terrains à vendre":
+            raise RuntimeError("site indisponible")
+        return annonces(2)
+
+    monkeypatch.setattr(batch, "scraper_multi_pages", scraper)
+    resume = batch.rafraichir_categories(1)
+
+    statuts = {r["categorie"]: (r["statut"], r["nb_annonces"]) for r in resume["categories"]}
+    assert statuts == {
+        "Appartements à louer": ("ok", 2),
+        "Appartements meublés": ("vide", 0),
+        "Terrains à vendre": ("echec", 0)
+    }
+    assert resume["categories"][2]["erreur"] == "site indisponible"
+    assert resume["succes"] is False
+    assert len(pd.read_csv(fichiers["Appartements à louer"])) == 2
+    # Un seul navigateur partagé, fermé en fin de run
+    assert len(drivers) == 1 and drivers[0].ferme
+
+
+def test_driver_recree_apres_session_perdue(fichiers, drivers, monkeypatch):
+    def scraper(nb_pages, categorie, driver=None):
+        if categorie == "Appartements à louer":
+            driver.mort = True
+            return pd.DataFrame()
+        return annonces(1)
+
+    monkeypatch.setattr(batch, "scraper_multi_pages", scraper)
+    resume = batch.rafraichir_categories(1)
+
+    premier, *suivants = resume["categories"]
+    assert premier["statut"] == "echec"
+    assert "Session Chrome perdue" in premier["erreur"]
+    assert [r["statut"] for r in suivants] == ["ok", "ok"]
+    assert len(drivers) == 2 and drivers[0].ferme
+
+
+def test_main_affiche_le_resume_et_retourne_le_code_de_sortie(fichiers, drivers, monkeypatch, capsys):
+    monkeypatch.setattr(batch, "scraper_multi_pages", lambda nb_pages, categorie, driver=None: annonces(1))
+    assert batch.main(["--pages", "2"]) == 0
+    resume = json.loads(capsys.readouterr().out)
+    assert resume["succes"] and resume["nb_pages"] == 2
+
+    monkeypatch.setattr(batch, "scraper_multi_pages", lambda nb_pages, categorie, driver=None: pd.DataFrame())
+    assert batch.main(["--categorie", "Terrains à vendre"]) == 1
+    resume = json.loads(capsys.readouterr().out)
+    assert [r["statut"] for r in resume["categories"]] == ["vide"]
+
+
+@pytest.mark.parametrize("pages", ["0", "-3", "abc"])
+def test_pages_invalides_refusees(pages):
+    with pytest.raises(SystemExit) as erreur:
+        batch.main(["--pages", pages])
+    assert erreur.value.code == 2
@@ -0,0 +1,216 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from scraper import jobs
+from scraper.jobs import GestionnaireJobs, lire_job, lister_jobs, EN_ATTENTE, EN_COURS, TERMINE, ANNULE, ECHEC, INTERROMPU
+
+CATEGORIE = "Terrains à vendre"
+
+
+class FauxPool:
+    """Pool qui garde les tâches en file sans jamais les exécuter"""
+
+    def __init__(self, casse=False):
+        self.casse = casse
+        self.soumis = []
+
+    def submit(self, fn, *args):
+        if self.casse:
+            raise BrokenProcessPool("worker mort")
+        self.soumis.append(args)
+        return Future()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def dossier_jobs(tmp_path, monkeypatch):
+    dossier = tmp_path / "jobs"
+    dossier.mkdir()
+    monkeypatch.setattr(jobs, "DOSSIER_JOBS", str(dossier))
+    return dossier
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    crees = []
+
+    def creer_pool(self):
+        crees.append(FauxPool())
+        return crees[-1]
+
+    monkeypatch.setattr(GestionnaireJobs, "_creer_pool", creer_pool)
+    return crees
+
+
+def creer_job(job_id, statut=EN_ATTENTE, categorie=CATEGORIE, cree_le=None):
+    jobs._ecrire_job({
+        "id": job_id,
+        "categorie": categorie,
+        "nb_pages": 2,
+        "statut": statut,
+        "page": 0,
+        "nb_annonces": 0,
+        "cree_le": cree_le or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    })
+
+
+def vieillir_battement(job_id, secondes):
+    chemin = jobs._chemin_battement(job_id)
+    with open(chemin, "a", encoding="utf-8"):
+        pass
+    passe = time.time() - secondes
+    os.utime(chemin, (passe, passe))
+
+
+def test_executer_job_en_attente_en_cours_termine(tmp_path, monkeypatch):
+    sortie = tmp_path / "sortie.csv"
+    vus = []
+
+    def scraper(nb_pages, categorie, callback_progression=None):
+        vus.append((lire_job("a")["statut"], os.path.exists(jobs._chemin_battement("a"))))
+        callback_progression(1, nb_pages, 2)
+        return pd.DataFrame({"details": ["Villa", "Studio"]})
+
+    monkeypatch.setattr(jobs, "scraper_multi_pages", scraper)
+    creer_job("a")
+    jobs._executer_job("a", 2, CATEGORIE, str(sortie))
+
+    job = lire_job("a")
+    assert vus == [(EN_COURS, True)]
+    assert (job["statut"], job["page"], job["nb_annonces"]) == (TERMINE, 1, 2)
+    assert len(pd.read_csv(sortie)) == 2
+    assert not os.path.exists(jobs._chemin_battement("a"))
+
+
+def test_executer_job_annule(tmp_path, monkeypatch):
+    def scraper(nb_pages, categorie, callback_progression=None):
+        open(jobs._chemin_annulation("a"), "w").close()
+        callback_progression(1, nb_pages, 5)
+        return pd.DataFrame({"details": ["Villa"]})
+
+    monkeypatch.setattr(jobs, "scraper_multi_pages", scraper)
+    creer_job("a")
+    jobs._executer_job("a", 2, CATEGORIE, str(tmp_path / "sortie.csv"))
+
+    assert lire_job("a")["statut"] == ANNULE
+    assert not (tmp_path / "sortie.csv").exists()
+    assert not jobs.annulation_demandee("a")
+
+
+def test_executer_job_echec(tmp_path, monkeypatch):
+    def scraper(nb_pages, categorie, callback_progression=None):
+        raise RuntimeError("Chrome introuvable")
+
+    monkeypatch.setattr(jobs, "scraper_multi_pages", scraper)
+    creer_job("a")
+    jobs._executer_job("a", 2, CATEGORIE, str(tmp_path / "sortie.csv"))
+
+    job = lire_job("a")
+    assert (job["statut"], job["erreur"]) == (ECHEC, "Chrome introuvable")
+
+
+def test_executer_job_ne_relance_pas_un_job_interrompu(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "scraper_multi_pages", pytest.fail)
+    creer_job("a", statut=INTERROMPU)
+    jobs._executer_job("a", 2, CATEGORIE, str(tmp_path / "sortie.csv"))
+    assert lire_job("a")["statut"] == INTERROMPU
+
+
+def test_executer_job_s_arrete_si_interrompu_en_cours_de_route(tmp_path, monkeypatch):
+    def scraper(nb_pages, categorie, callback_progression=None):
+        jobs._mettre_a_jour_job("a", statut=INTERROMPU)
+        callback_progression(1, nb_pages, 1)
+        return pd.DataFrame({"details": ["Villa"]})
+
+    monkeypatch.setattr(jobs, "scraper_multi_pages", scraper)
+    creer_job("a")
+    jobs._executer_job("a", 2, CATEGORIE, str(tmp_path / "sortie.csv"))
+
+    assert lire_job("a")["statut"] == INTERROMPU
+    assert not (tmp_path / "sortie.csv").exists()
+
+
+def test_soumettre_refuse_une_categorie_deja_active(pools):
+    gestionnaire = GestionnaireJobs()
+    gestionnaire.soumettre(CATEGORIE, 1)
+
+    with pytest.raises(ValueError, match="déjà en cours"):
+        gestionnaire.soumettre(CATEGORIE, 1)
+    gestionnaire.soumettre("Appartements meublés", 1)
+    assert len(pools[0].soumis) == 2
+
+
+def test_soumettre_concurrent_ne_cree_qu_un_job(pools):
+    gestionnaire = GestionnaireJobs()
+    resultats = []
+
+    def soumettre():
+        try:
+            resultats.append(gestionnaire.soumettre(CATEGORIE, 1))
+        except ValueError:
+            resultats.append(None)
+
+    fils = [threading.Thread(target=soumettre) for _ in range(5)]
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+
+    assert sum(r is not None for r in resultats) == 1
+    assert len(lister_jobs()) == 1
+
+
+def test_soumettre_remplace_un_pool_casse(pools):
+    gestionnaire = GestionnaireJobs()
+    pools[0].casse = True
+
+    job_id = gestionnaire.soumettre(CATEGORIE, 1)
+
+    assert len(pools) == 2 and len(pools[1].soumis) == 1
+    assert lire_job(job_id)["statut"] == EN_ATTENTE
+
+
+def test_jobs_orphelins_marques_interrompus(pools):
+    vieux = "2000-01-01 00:00:00"
+    creer_job("mort", statut=EN_COURS, cree_le=vieux)
+    vieillir_battement("mort", jobs.DELAI_ORPHELIN + 10)
+    creer_job("vivant", statut=EN_COURS, categorie="Appartements meublés", cree_le=vieux)
+    vieillir_battement("vivant", 1)
+    creer_job("sans_worker", statut=EN_ATTENTE, categorie="Appartements à louer", cree_le=vieux)
+
+    gestionnaire = GestionnaireJobs()
+    statuts = {job["id"]: job["statut"] for job in gestionnaire.lister()}
+
+    assert statuts == {"mort": INTERROMPU, "vivant": EN_COURS, "sans_worker": INTERROMPU}
+    gestionnaire.soumettre(CATEGORIE, 1)
+    with pytest.raises(ValueError):
+        gestionnaire.soumettre("Appartements meublés", 1)
+
+
+def test_job_en_file_du_gestionnaire_n_est_pas_orphelin(pools, monkeypatch):
+    monkeypatch.setattr(jobs, "DELAI_ORPHELIN", -1)
+    gestionnaire = GestionnaireJobs()
+    job_id = gestionnaire.soumettre(CATEGORIE, 1)
+    assert lire_job(job_id)["statut"] == EN_ATTENTE
+    assert [job["statut"] for job in gestionnaire.lister()] == [EN_ATTENTE]
+
+
+def test_purger_jobs_garde_les_plus_recents(dossier_jobs):
+    for i in range(jobs.NB_JOBS_CONSERVES + 5):
+        creer_job(f"t{i:02d}", statut=TERMINE, cree_le=f"2024-01-01 00:00:{i:02d}")
+    creer_job("actif", statut=EN_COURS, cree_le="2000-01-01 00:00:00")
+
+    jobs.purger_jobs()
+
+    restants = {job["id"] for job in lister_jobs()}
+    assert len(restants) == jobs.NB_JOBS_CONSERVES + 1
+    assert "actif" in restants and "t24" in restants and "t04" not in restants
@@ -0,0 +1,79 @@
+import pandas as pd
+
+from dashboard import recherche
+from dashboard.recherche import IndexInverse, charger_index, chemin_index, tokeniser
+
+
+def construire(titres, localisations):
+    return IndexInverse.construire(pd.DataFrame({"Titre": titres, "Localisation": localisations}))
+
+
+def test_tokeniser_retire_accents_casse_et_ligatures():
+    assert tokeniser("Villa à Almadiès") == ["villa", "a", "almadies"]
+    assert tokeniser("Sacré-Cœur 3") == ["sacre", "coeur", "3"]
+    assert tokeniser("ÆRO Straße") == ["aero", "strasse"]
+
+
+def test_recherche_insensible_aux_accents_et_ligatures():
+    index = construire(["Studio meublé", "Villa"], ["Sacré-Cœur, Dakar", "Ngor, Dakar"])
+    assert list(index.rechercher("sacre coeur")) == [0]
+    assert list(index.rechercher("MEUBLE")) == [0]
+
+
+def test_recherche_par_prefixe():
+    index = construire(["Villa avec piscine", "Studio", "Duplex piscines"], ["Almadies", "Ngor", None])
+    assert sorted(index.rechercher("pisc")) == [0, 2]
+    assert list(index.rechercher("almad")) == [0]
+
+
+def test_prefixe_trop_court_ne_correspond_qu_au_mot_exact():
+    index = construire(["Studio meublé", "Villa"], ["Ngor", "Mermoz"])
+    assert list(index.rechercher("m")) == []
+    assert sorted(index.rechercher("me")) == [0, 1]
+
+
+def test_expansion_limitee_aux_termes_les_plus_frequents(monkeypatch):
+    monkeypatch.setattr(recherche, "MAX_EXPANSIONS", 2)
+    index = construire(["villa", "villas", "villas", "villageois", "villageois", "villageois"], [""] * 6)
+    # « villa » (exact) est toujours gardé, puis le terme le plus fréquent
+    assert sorted(index.rechercher("villa")) == [0, 3, 4, 5]
+
+
+def test_tous_les_mots_doivent_correspondre():
+    index = construire(["Villa avec piscine", "Appartement", "Piscine"], ["Almadies", "Almadies", "Ngor"])
+    assert list(index.rechercher("piscine almadies")) == [0]
+    assert list(index.rechercher("piscine inconnu")) == []
+    assert list(index.rechercher("")) == []
+
+
+def test_correspondance_exacte_avant_prefixe():
+    # « piscine » est plus fréquent que « piscines » : son IDF propre serait plus faible
+    index = construire(
+        ["villa piscines", "villa piscine", "studio piscine", "duplex piscine"],
+        ["almadies", "Almadiès", "Ngor", "Yoff"]
+    )
+    assert list(index.rechercher("piscine almadies")) == [1, 0]
+
+
+def test_index_persiste_et_reconstruit_si_version_change(tmp_path):
+    chemin = tmp_path / "donnees.csv"
+    df = pd.DataFrame({"Titre": ["Villa avec piscine"], "Localisation": ["Almadies"]})
+    df.to_csv(chemin, index=False)
+
+    charger_index(str(chemin), df, (1, 1))
+    assert (tmp_path / "donnees.csv.index.pkl").exists()
+    assert chemin_index(str(chemin)).endswith(".index.pkl")
+    assert list(charger_index(str(chemin), df, (1, 1)).rechercher("piscine")) == [0]
+
+    autre = pd.DataFrame({"Titre": ["Studio", "Piscine"], "Localisation": ["Ngor", "Yoff"]})
+    assert list(charger_index(str(chemin), autre, (2, 2)).rechercher("piscine")) == [1]
+
+
+def test_index_illisible_ou_etranger_reconstruit(tmp_path):
+    chemin = tmp_path / "donnees.csv"
+    df = pd.DataFrame({"Titre": ["Villa avec piscine"], "Localisation": ["Almadies"]})
+
+    # Pickle référençant un module absent (ImportError) puis fichier tronqué
+    for contenu in (b"cmodule_inexistant\nClasse\n.", b"\x80"):
+        (tmp_path / "donnees.csv.index.pkl").write_bytes(contenu)
+        assert list(charger_index(str(chemin), df, (1, 1)).rechercher("piscine")) == [0]
@@ -0,0 +1,14 @@
+from scraper.selenium_scraper import nettoyer_donnees
+
+
+def test_nettoyer_donnees_nettoie_et_complete_les_colonnes():
+    df = nettoyer_donnees([{"details": " Villa avec piscine ", "adresse": "Almadies, Dakar", "prix": 3}])
+
+    assert df.loc[0, "details"] == "Villa avec piscine"
+    assert df.loc[0, "prix"] == 3
+    assert df.loc[0, "image_lien"] is None
+    assert {"categorie", "chambres", "superficie"} <= set(df.columns)
+
+
+def test_nettoyer_donnees_sans_annonce():
+    assert nettoyer_donnees([]).empty